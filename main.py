@@ -1,15 +1,72 @@
 import os
 import sys
-import yaml
+import queue
+import atexit
 import logging
-import importlib
+import threading
+import functools
+import multiprocessing
+import logging.handlers
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 from storage.db_handler import DatabaseHandler
 from storage.file_handler import FileHandler
+from utils.yaml_cache import load_yaml_cached, thaw
+from utils.crawler_loader import resolve_site_crawler, create_crawler
+from utils.http_session import create_http_session
+
+# 每个工作线程独立持有存储处理器，避免多线程争用同一数据库连接
+_local = threading.local()
+
+# 进程内共享的 HTTP 会话，在多个站点间复用连接
+_http_session = None
+_http_lock = threading.Lock()
+
+# 子进程启动方式：主进程中已有日志监听等线程，fork 可能因继承被占用的锁而死锁
+MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# 执行模式：thread 适合 I/O 密集型爬虫，process 适合 Selenium 或解析开销大的爬虫
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': functools.partial(ProcessPoolExecutor, mp_context=MP_CONTEXT),
+}
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def _create_log_handlers(log_file):
+    """创建实际写日志的处理器"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.FileHandler(log_file, encoding='utf-8', delay=True),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+def _init_worker_logging(log_file):
+    """process 模式子进程的日志初始化
+    
+    子进程中没有日志队列的监听线程，改为直接写日志文件。
+    forkserver/spawn 启动的子进程不会继承主进程的日志级别，需要重新设置。
+    """
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in _create_log_handlers(log_file):
+        root.addHandler(handler)
 
 def setup_logging():
-    """设置日志"""
+    """设置日志，返回 (logger, 日志文件路径)
+    
+    日志记录先放入队列，由后台线程统一写入文件和控制台，
+    避免并发爬虫争用日志锁。
+    """
     log_dir = 'logs'
     os.makedirs(log_dir, exist_ok=True)
     
@@ -17,33 +74,75 @@ def setup_logging():
     log_file = os.path.join(log_dir, f"crawler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
     
     # 配置日志
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *_create_log_handlers(log_file))
+    listener.start()
+    atexit.register(listener.stop)
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
     
     logger = logging.getLogger('main')
-    logger.info(f"日志初始化完成，日志文件：{log_file}")
-    return logger
+    logger.info("日志初始化完成，日志文件：%s", log_file)
+    return logger, log_file
 
 def load_config():
     """加载配置"""
-    with open('config/settings.py', 'r', encoding='utf-8') as f:
-        settings = {}
-        exec(f.read(), settings)
+    # 通过 importlib 加载，可以复用 __pycache__ 中的字节码
+    spec = importlib.util.spec_from_file_location('_settings', 'config/settings.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    settings = {k: getattr(module, k) for k in dir(module) if k.isupper()}
     
-    with open('config/sites.yml', 'r', encoding='utf-8') as f:
-        sites = yaml.safe_load(f)
+    sites = load_yaml_cached('config/sites.yml')
     
     return settings, sites
 
+def _get_storage_handlers(settings):
+    """获取当前线程的存储处理器"""
+    handlers = getattr(_local, 'storage_handlers', None)
+    if handlers is None:
+        handlers = _local.storage_handlers = [
+            DatabaseHandler(settings['DB_CONFIG']),
+            FileHandler(settings['FILE_STORAGE_PATH'])
+        ]
+    return handlers
+
+def _get_http_session():
+    """获取当前进程共享的 HTTP 会话"""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            _http_session = create_http_session()
+        return _http_session
+
+def _crawl_one(i, total, site_id, site_config, settings):
+    """爬取单个站点，返回 (site_id, 是否成功, 异常)
+    
+    process 模式下该函数在子进程中执行，存储处理器在子进程内创建。
+    """
+    logger = logging.getLogger('main')
+    try:
+        logger.info("[%d/%d] 开始爬取站点: %s (%s)", i, total, site_config['name'], site_id)
+        
+        # 查找爬虫类（同一站点只导入一次）
+        crawler_class = resolve_site_crawler(site_id, site_config)
+        
+        # 实例化并运行爬虫
+        crawler = create_crawler(
+            crawler_class, site_config, _get_storage_handlers(settings),
+            http=_get_http_session()
+        )
+        crawler.run(max_pages=settings.get('MAX_PAGES', 3))
+        
+        return site_id, True, None
+    except Exception as e:
+        return site_id, False, e
+
 def main():
     """主程序"""
-    logger = setup_logging()
+    logger, log_file = setup_logging()
     logger.info("多功能内容爬虫启动")
     
     # 统计成功和失败的站点
@@ -53,53 +152,50 @@ def main():
     try:
         # 加载配置
         settings, sites = load_config()
-        logger.info(f"已加载 {len(sites)} 个站点配置")
+        logger.info("已加载 %d 个站点配置", len(sites))
         
-        # 初始化存储处理器
-        storage_handlers = [
-            DatabaseHandler(settings['DB_CONFIG']),
-            FileHandler(settings['FILE_STORAGE_PATH'])
-        ]
+        site_items = list(sites.items())
+        total = len(site_items)
+        
+        mode = settings.get('EXECUTOR_MODE', 'thread')
+        if mode not in EXECUTORS:
+            raise ValueError(f"不支持的执行模式: {mode}")
+        
+        executor_kwargs = {'max_workers': settings.get('CRAWL_WORKERS', 8)}
+        if mode == 'process':
+            executor_kwargs.update(initializer=_init_worker_logging, initargs=(log_file,))
         
-        # 运行各站点爬虫
-        for i, (site_id, site_config) in enumerate(sites.items(), 1):
-            try:
-                logger.info(f"[{i}/{len(sites)}] 开始爬取站点: {site_config['name']} ({site_id})")
-                
-                # 动态导入爬虫类
+        # 各站点爬虫并发运行
+        with EXECUTORS[mode](**executor_kwargs) as executor:
+            # 只读的站点配置无法 pickle，传给子进程前还原为普通 dict
+            futures = {
+                executor.submit(
+                    _crawl_one, i, total, site_id,
+                    thaw(site_config) if mode == 'process' else site_config, settings
+                ): (i, site_id)
+                for i, (site_id, site_config) in enumerate(site_items, 1)
+            }
+            
+            for future in as_completed(futures):
+                i, site_id = futures[future]
                 try:
-                    crawler_module = importlib.import_module(f"crawlers.{site_id}_crawler")
-                except ModuleNotFoundError:
-                    # 如果找不到指定模块，尝试使用通用爬虫类模块
-                    primary_type = site_config.get('primary_type', '')
-                    if primary_type == 'poem':
-                        crawler_module = importlib.import_module("crawlers.poem_crawler")
-                    elif primary_type == 'university':
-                        crawler_module = importlib.import_module("crawlers.university_crawler")
-                    elif primary_type == 'wiki':
-                        crawler_module = importlib.import_module("crawlers.wiki_crawler") 
-                    elif primary_type == 'joke':
-                        crawler_module = importlib.import_module("crawlers.joke_crawler")
-                    else:
-                        raise ModuleNotFoundError(f"找不到爬虫模块: crawlers.{site_id}_crawler")
-                
-                crawler_class = getattr(crawler_module, site_config['crawler_class'])
-                
-                # 实例化并运行爬虫
-                crawler = crawler_class(site_config, storage_handlers)
-                crawler.run(max_pages=settings.get('MAX_PAGES', 3))
-                
-                success_count += 1
-                logger.info(f"[{i}/{len(sites)}] 站点 {site_config['name']} 爬取完成")
-                
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"[{i}/{len(sites)}] 站点 {site_id} 爬取失败: {e}", exc_info=True)
+                    _, ok, err = future.result()
+                except Exception as e:
+                    # 子进程异常退出等情况下拿不到结果，只记该站点失败
+                    ok, err = False, e
+                if ok:
+                    success_count += 1
+                    logger.info("[%d/%d] 站点 %s 爬取完成", i, total, sites[site_id]['name'])
+                else:
+                    failed_count += 1
+                    logger.error("[%d/%d] 站点 %s 爬取失败: %s", i, total, site_id, err, exc_info=err)
     
     except Exception as e:
-        logger.error(f"程序运行出错: {e}", exc_info=True)
+        logger.error("程序运行出错: %s", e, exc_info=True)
     finally:
-        logger.info(f"爬虫运行完成，成功: {success_count} 个站点，失败: {failed_count} 个站点")
+        if _http_session is not None:
+            _http_session.close()
+        logger.info("爬虫运行完成，成功: %d 个站点，失败: %d 个站点", success_count, failed_count)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,16 +3,85 @@
 
 import os
 import time
-import yaml
+import queue
+import heapq
+import atexit
 import logging
-import schedule
-import importlib
+import itertools
 import threading
+import multiprocessing
+import importlib.util
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 
 from storage.db_handler import DatabaseHandler
 from storage.file_handler import FileHandler
 from utils.logger import setup_logger
+from utils.yaml_cache import load_yaml_cached, thaw
+from utils.crawler_loader import resolve_site_crawler, create_crawler
+from utils.http_session import create_http_session
+
+# 子进程启动方式：调度器中有多个爬虫线程和定时器，fork 可能因继承被占用的锁而死锁
+MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# 调度循环单次最长休眠时间：time.sleep 按单调时钟计时，
+# 系统时间被调整后最多延迟这么久才会发现任务到期
+MAX_SLEEP_SECONDS = 60
+
+def _next_daily_run(hour):
+    """计算下一个 hour 点整的时间戳"""
+    now = datetime.now()
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return run_at.timestamp()
+
+def _create_storage_handlers(settings):
+    """创建一组存储处理器，每组持有独立的数据库连接"""
+    return [
+        DatabaseHandler(settings['DB_CONFIG']),
+        FileHandler(settings['FILE_STORAGE_PATH'])
+    ]
+
+def _init_worker_logging():
+    """process 模式子进程的日志初始化
+    
+    forkserver/spawn 启动的子进程不会继承主进程的日志配置，
+    按调度器相同的方式重新设置，爬虫日志才不会被丢弃。
+    """
+    setup_logger('scheduler')
+
+# 子进程内复用的存储处理器和 HTTP 会话
+_worker_storage_handlers = None
+_worker_http = None
+
+def _worker_entry(site_id, site_config, settings, storage_handlers=None, crawler_class=None,
+                  http=None):
+    """运行单个站点爬虫
+    
+    process 模式下在子进程中执行，数据库连接和 HTTP 会话无法跨进程传递，
+    因此在子进程内重建。
+    """
+    global _worker_storage_handlers, _worker_http
+    if storage_handlers is None:
+        if _worker_storage_handlers is None:
+            _worker_storage_handlers = _create_storage_handlers(settings)
+        storage_handlers = _worker_storage_handlers
+    if http is None:
+        if _worker_http is None:
+            _worker_http = create_http_session()
+        http = _worker_http
+    
+    if crawler_class is None:
+        crawler_class = resolve_site_crawler(site_id, site_config)
+    
+    # 实例化并运行爬虫
+    crawler = create_crawler(crawler_class, site_config, storage_handlers, http=http)
+    crawler.run(max_pages=settings.get('MAX_PAGES', 3))
 
 class CrawlerScheduler:
     """爬虫调度器，负责管理和调度所有爬虫任务"""
@@ -25,104 +94,211 @@ class CrawlerScheduler:
         # 加载配置
         self.settings = self._load_settings(config_path)
         self.sites = self._load_sites(sites_path)
+        self._crawler_classes = self._resolve_crawlers()
+        
+        # 执行模式：thread 直接在线程中运行爬虫，process 将爬虫交给子进程运行
+        self.executor_mode = self.settings.get('EXECUTOR_MODE', 'thread')
+        if self.executor_mode not in ('thread', 'process'):
+            raise ValueError(f"不支持的执行模式: {self.executor_mode}")
         
-        # 存储处理器
-        self.storage_handlers = [
-            DatabaseHandler(self.settings['DB_CONFIG']),
-            FileHandler(self.settings['FILE_STORAGE_PATH'])
-        ]
+        # 存储处理器池，每个运行中的爬虫取出一组独占使用，避免争用同一数据库连接
+        # （process 模式下由子进程自行创建）
+        self.storage_pool = queue.LifoQueue()
+        self.http = None
+        self.process_pool = None
+        self._process_pool_lock = threading.Lock()
+        if self.executor_mode == 'thread':
+            # 共享的 HTTP 会话，在多次爬取间复用连接
+            self.http = create_http_session()
+        else:
+            self.process_pool = self._create_process_pool()
+            atexit.register(self._shutdown_process_pool)
         
         # 运行状态
+        # running_tasks 仅记录运行状态，是否在运行由 _inflight 中的站点锁判断
         self.running_tasks = {}
-        self.lock = threading.Lock()
+        self._inflight = {}
+        
+        # run_all_crawlers 错开启动各站点使用的定时器
+        self._stagger_timers = []
+        
+        # 定时任务堆：(下次运行时间戳, 任务序号, 函数, 参数, 每天运行的整点)
+        self.jobs = []
+        self._job_ids = itertools.count()
+        
+        # 常驻线程池，限制并发爬虫数量并在多次调度间复用线程
+        # process 模式下线程只负责等待子进程结果并更新运行状态
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.settings.get('MAX_WORKERS', 8),
+            thread_name_prefix='crawler'
+        )
+        atexit.register(self.pool.shutdown, wait=False)
     
     def _load_settings(self, config_path):
         """加载主配置文件"""
-        settings = {}
-        with open(config_path, 'r', encoding='utf-8') as f:
-            exec(f.read(), settings)
-        return settings
+        # 通过 importlib 加载，可以复用 __pycache__ 中的字节码
+        spec = importlib.util.spec_from_file_location('_settings', config_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return {k: getattr(module, k) for k in dir(module) if k.isupper()}
     
     def _load_sites(self, sites_path):
         """加载站点配置"""
-        with open(sites_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_yaml_cached(sites_path)
+    
+    def _resolve_crawlers(self):
+        """启动时预先查找所有站点的爬虫类
+        
+        导入模块主要耗时在查找和读取文件上，多个站点的爬虫模块并发导入。
+        """
+        crawler_classes = {}
+        with ThreadPoolExecutor(max_workers=8, thread_name_prefix='import') as executor:
+            futures = {
+                executor.submit(resolve_site_crawler, site_id, site_config): site_id
+                for site_id, site_config in self.sites.items()
+            }
+            for future in as_completed(futures):
+                site_id = futures[future]
+                try:
+                    crawler_classes[site_id] = future.result()
+                except Exception as e:
+                    # 运行时会重新查找并记录失败状态
+                    self.logger.error("站点 %s 爬虫类加载失败: %s", site_id, e)
+        return crawler_classes
+    
+    def _create_process_pool(self):
+        """创建运行爬虫的子进程池"""
+        return ProcessPoolExecutor(
+            max_workers=self.settings.get('MAX_WORKERS', 8),
+            mp_context=MP_CONTEXT,
+            initializer=_init_worker_logging
+        )
+    
+    def _replace_process_pool(self, broken_pool):
+        """子进程异常退出导致进程池不可用时，换上新的进程池
+        
+        多个线程可能同时发现同一个进程池损坏，只替换一次。
+        """
+        with self._process_pool_lock:
+            if self.process_pool is broken_pool:
+                self.logger.warning("子进程异常退出，重建进程池")
+                broken_pool.shutdown(wait=False)
+                self.process_pool = self._create_process_pool()
+    
+    def _shutdown_process_pool(self):
+        """关闭当前的子进程池"""
+        with self._process_pool_lock:
+            if self.process_pool is not None:
+                self.process_pool.shutdown(wait=False)
+    
+    @contextmanager
+    def _checkout_storage(self):
+        """从池中取出一组存储处理器，用完后放回
+        
+        池中没有空闲处理器时新建一组，数量不会超过线程池大小。
+        """
+        try:
+            storage_handlers = self.storage_pool.get_nowait()
+        except queue.Empty:
+            storage_handlers = _create_storage_handlers(self.settings)
+        try:
+            yield storage_handlers
+        finally:
+            self.storage_pool.put(storage_handlers)
     
     def run_crawler(self, site_id):
         """运行指定站点的爬虫"""
         if site_id not in self.sites:
-            self.logger.error(f"站点 {site_id} 配置不存在")
+            self.logger.error("站点 %s 配置不存在", site_id)
             return False
         
-        # 防止同一爬虫并发运行
-        with self.lock:
-            if site_id in self.running_tasks and self.running_tasks[site_id]['running']:
-                self.logger.warning(f"站点 {site_id} 爬虫已在运行中")
-                return False
-            
-            self.running_tasks[site_id] = {
-                'running': True,
-                'start_time': datetime.now()
-            }
+        # 防止同一爬虫并发运行：setdefault 保证每个站点只有一把锁，非阻塞获取失败说明已在运行
+        inflight = self._inflight.setdefault(site_id, threading.Lock())
+        if not inflight.acquire(blocking=False):
+            self.logger.warning("站点 %s 爬虫已在运行中", site_id)
+            return False
+        
+        task = self.running_tasks[site_id] = {
+            'running': True,
+            'start_time_ns': time.monotonic_ns()
+        }
         
         try:
-            self.logger.info(f"开始运行站点 {site_id} 爬虫")
+            self.logger.info("开始运行站点 %s 爬虫", site_id)
             site_config = self.sites[site_id]
             
-            # 动态导入爬虫类
-            crawler_module = importlib.import_module(f"crawlers.{site_id}_crawler")
-            crawler_class = getattr(crawler_module, site_config['crawler_class'])
-            
-            # 实例化并运行爬虫
-            crawler = crawler_class(site_config, self.storage_handlers)
-            max_pages = self.settings.get('MAX_PAGES', 3)
-            crawler.run(max_pages=max_pages)
+            if self.process_pool is not None:
+                process_pool = self.process_pool
+                try:
+                    # 只读的站点配置无法 pickle，传给子进程前还原为普通 dict
+                    process_pool.submit(
+                        _worker_entry, site_id, thaw(site_config), self.settings
+                    ).result()
+                except BrokenProcessPool:
+                    # 本站点记为失败，其他站点使用新的进程池继续运行
+                    self._replace_process_pool(process_pool)
+                    raise
+            else:
+                with self._checkout_storage() as storage_handlers:
+                    _worker_entry(
+                        site_id, site_config, self.settings, storage_handlers,
+                        self._crawler_classes.get(site_id), self.http
+                    )
             
             # 更新运行状态
-            with self.lock:
-                self.running_tasks[site_id]['running'] = False
-                self.running_tasks[site_id]['end_time'] = datetime.now()
-                self.running_tasks[site_id]['status'] = 'success'
+            task['status'] = 'success'
             
-            self.logger.info(f"站点 {site_id} 爬虫运行完成")
+            self.logger.info("站点 %s 爬虫运行完成", site_id)
             return True
             
         except Exception as e:
-            self.logger.error(f"站点 {site_id} 爬虫运行失败: {e}", exc_info=True)
+            self.logger.error("站点 %s 爬虫运行失败: %s", site_id, e, exc_info=True)
             
             # 更新运行状态
-            with self.lock:
-                self.running_tasks[site_id]['running'] = False
-                self.running_tasks[site_id]['end_time'] = datetime.now()
-                self.running_tasks[site_id]['status'] = 'failed'
-                self.running_tasks[site_id]['error'] = str(e)
+            task['status'] = 'failed'
+            task['error'] = str(e)
             
             return False
+        finally:
+            task['end_time_ns'] = time.monotonic_ns()
+            task['duration'] = (task['end_time_ns'] - task['start_time_ns']) / 1e9
+            task['running'] = False
+            inflight.release()
+    
+    def _submit_crawler(self, site_id):
+        """将站点爬虫提交到线程池，调度循环无需等待爬取完成"""
+        self.pool.submit(self.run_crawler, site_id)
     
     def run_all_crawlers(self):
         """运行所有站点爬虫"""
         self.logger.info("开始运行所有站点爬虫")
         
-        for site_id in self.sites:
-            threading.Thread(
-                target=self.run_crawler,
-                args=(site_id,),
-                name=f"crawler-{site_id}"
-            ).start()
-            
-            # 避免同时启动太多爬虫
-            time.sleep(5)
+        # 按固定间隔错开各站点的启动时间，避免同时请求上游站点；
+        # 定时器到期后提交到线程池，调用方无需等待
+        stagger = self.settings.get('STAGGER_S', 2.0)
+        self._stagger_timers = [t for t in self._stagger_timers if t.is_alive()]
+        for i, site_id in enumerate(self.sites):
+            timer = threading.Timer(i * stagger, self._submit_crawler, args=(site_id,))
+            timer.start()
+            self._stagger_timers.append(timer)
+    
+    def _add_daily_job(self, hour, func, *args):
+        """添加每天 hour 点整运行的任务"""
+        heapq.heappush(
+            self.jobs,
+            (_next_daily_run(hour), next(self._job_ids), func, args, hour)
+        )
     
     def schedule_jobs(self):
         """设置定时任务"""
-        # 每天凌晨2点运行所有爬虫
-        schedule.every().day.at("02:00").do(self.run_all_crawlers)
+        # 每个站点每天按错开的整点运行一次
+        schedule_table = sorted(((8 + i) % 24, site_id) for i, site_id in enumerate(self.sites))
+        for hour, site_id in schedule_table:
+            self._add_daily_job(hour, self._submit_crawler, site_id)
         
-        # 为不同站点设置不同的时间
-        for i, site_id in enumerate(self.sites):
-            # 错开不同站点的爬取时间
-            hour = (8 + i) % 24
-            schedule.every().day.at(f"{hour:02d}:00").do(self.run_crawler, site_id)
+        # 各站点已单独调度，凌晨2点的全量运行默认关闭以免每天重复爬取
+        if self.settings.get('DAILY_FULL_SWEEP', False):
+            self._add_daily_job(2, self.run_all_crawlers)
         
         self.logger.info("定时任务已设置")
     
@@ -136,15 +312,31 @@ class CrawlerScheduler:
             if self.settings.get('RUN_ON_START', True):
                 self.run_all_crawlers()
             
-            # 主循环
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
+            if not self.jobs:
+                self.logger.warning("没有需要调度的定时任务")
+            
+            # 主循环：休眠到最近一个任务的运行时间，运行后按本地时间重新计算下次运行时间入堆
+            # （夏令时切换后仍在整点运行，错过多次时如系统休眠也只补跑一次）
+            while self.jobs:
+                next_ts, job_id, func, args, hour = self.jobs[0]
+                delay = next_ts - time.time()
+                if delay > 0:
+                    time.sleep(min(delay, MAX_SLEEP_SECONDS))
+                    continue
+                
+                heapq.heapreplace(self.jobs, (_next_daily_run(hour), job_id, func, args, hour))
+                func(*args)
         except KeyboardInterrupt:
             self.logger.info("调度器被手动终止")
         except Exception as e:
-            self.logger.error(f"调度器运行出错: {e}", exc_info=True)
+            self.logger.error("调度器运行出错: %s", e, exc_info=True)
         finally:
+            for timer in self._stagger_timers:
+                timer.cancel()
+            self.pool.shutdown(wait=False)
+            self._shutdown_process_pool()
+            if self.http is not None:
+                self.http.close()
             self.logger.info("爬虫调度器已停止")
 
 if __name__ == "__main__":
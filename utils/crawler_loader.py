@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import inspect
+import functools
+import importlib
+
+from utils.yaml_cache import thaw
+
+# primary_type -> 通用爬虫模块，站点没有专用爬虫模块时使用
+_PRIMARY_TYPE_MODULES = {
+    'poem': "crawlers.poem_crawler",
+    'university': "crawlers.university_crawler",
+    'wiki': "crawlers.wiki_crawler",
+    'joke': "crawlers.joke_crawler",
+}
+
+def _import_type_module(site_id, primary_type):
+    """导入 primary_type 对应的通用爬虫模块
+
+    importlib.import_module 会先查 sys.modules，并在模块正在被其他线程
+    导入时等待导入完成，多个站点并发查找同一模块也是安全的。
+    """
+    module_name = _PRIMARY_TYPE_MODULES.get(primary_type)
+    if not module_name:
+        raise ModuleNotFoundError(f"找不到爬虫模块: crawlers.{site_id}_crawler")
+
+    return importlib.import_module(module_name)
+
+@functools.lru_cache(maxsize=None)
+def resolve_crawler(site_id, class_name, primary_type=''):
+    """根据站点 ID 查找爬虫类，结果会被缓存
+
+    优先导入 crawlers.<site_id>_crawler，找不到时根据 primary_type
+    使用通用爬虫模块。
+    """
+    try:
+        crawler_module = importlib.import_module(f"crawlers.{site_id}_crawler")
+    except ModuleNotFoundError:
+        # 如果找不到指定模块，尝试使用通用爬虫类模块
+        crawler_module = _import_type_module(site_id, primary_type)
+
+    return getattr(crawler_module, class_name)
+
+def resolve_site_crawler(site_id, site_config):
+    """根据站点配置查找爬虫类"""
+    return resolve_crawler(
+        site_id, site_config['crawler_class'], site_config.get('primary_type', '')
+    )
+
+@functools.lru_cache(maxsize=None)
+def _accepts_http(crawler_class):
+    """判断爬虫类构造函数是否支持 http 参数"""
+    try:
+        params = inspect.signature(crawler_class).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        p.name == 'http' or p.kind is inspect.Parameter.VAR_KEYWORD
+        for p in params
+    )
+
+def create_crawler(crawler_class, site_config, storage_handlers, http=None):
+    """实例化爬虫，爬虫支持时传入共享的 HTTP 会话
+
+    缓存中的站点配置是只读结构，这里还原为普通 dict/list 后再交给爬虫，
+    无论哪种执行模式爬虫拿到的类型都一致，也可以自行修改。
+    """
+    site_config = thaw(site_config)
+    if http is not None and _accepts_http(crawler_class):
+        return crawler_class(site_config, storage_handlers, http=http)
+    return crawler_class(site_config, storage_handlers)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+import types
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+
+import yaml
+
+# 优先使用 libyaml 提供的 C 解析器
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# 优先使用 orjson 读写 JSON 旁路缓存
+try:
+    import orjson
+
+    def _json_dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data):
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+    _json_loads = json.loads
+
+# 最多缓存的文件数量
+MAX_ENTRIES = 100
+
+# 绝对路径 -> (mtime_ns, size, 解析结果)
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+def _freeze(data):
+    """将解析结果转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(data, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(_freeze(v) for v in data)
+    return data
+
+def thaw(data):
+    """将只读结构还原为普通 dict/list，用于需要修改或跨进程传递（pickle）的场景"""
+    if isinstance(data, types.MappingProxyType):
+        return {k: thaw(v) for k, v in data.items()}
+    if isinstance(data, tuple):
+        return [thaw(v) for v in data]
+    return data
+
+def _write_json_cache(json_path, data, st):
+    """原子写入 JSON 旁路缓存，写入失败或数据无法无损转换为 JSON 时跳过
+
+    缓存中记录 YAML 文件的 mtime_ns 和大小，文件权限与 YAML 文件一致。
+    """
+    try:
+        content = _json_dumps({
+            'yaml_mtime_ns': st.st_mtime_ns,
+            'yaml_size': st.st_size,
+            'data': data,
+        })
+        # 日期、非字符串键等类型转换后会变化，这种情况下不写缓存
+        if _json_loads(content)['data'] != data:
+            return
+    except (TypeError, ValueError):
+        return
+
+    dir_name = os.path.dirname(json_path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            # mkstemp 创建的文件权限为 0600，以其他用户运行时将无法读取缓存
+            os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+            os.replace(tmp_path, json_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+def _load_via_json_cache(path, st):
+    """通过 JSON 旁路缓存加载 YAML 文件
+
+    在 YAML 文件旁写入 <文件名>.json，只有当缓存记录的 mtime_ns 和大小
+    与 YAML 文件（os.stat 结果 st）完全一致时才使用缓存，否则重新解析
+    YAML。这样即使 YAML 被替换为 mtime 更早的文件（cp -p、rsync -t 等）
+    也不会读到过期缓存。进程重启时可以跳过较慢的 YAML 解析。
+    """
+    json_path = path + '.json'
+    try:
+        with open(json_path, 'rb') as f:
+            cached = _json_loads(f.read())
+        if (isinstance(cached, dict)
+                and cached.get('yaml_mtime_ns') == st.st_mtime_ns
+                and cached.get('yaml_size') == st.st_size
+                and 'data' in cached):
+            return cached['data']
+    except (OSError, ValueError):
+        pass
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=SafeLoader)
+
+    _write_json_cache(json_path, data, st)
+    return data
+
+def load_yaml_cached(path):
+    """加载 YAML 文件，文件未修改时直接返回缓存结果
+
+    通过 os.stat 的 mtime 和文件大小判断文件是否变化。
+    返回值是只读结构（映射为 MappingProxyType，列表为 tuple），
+    命中缓存时无需拷贝；需要修改或传给外部代码时先调用 thaw()。
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and (st.st_mtime_ns, st.st_size) == cached[:2]:
+            _cache.move_to_end(path)
+            return cached[2]
+
+    data = _freeze(_load_via_json_cache(path, st))
+
+    with _lock:
+        _cache[path] = (st.st_mtime_ns, st.st_size, data)
+        _cache.move_to_end(path)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return data